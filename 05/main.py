@@ -98,7 +98,17 @@ Simplified Question...
 '''
 
 # Imports
-from typing import TypeAlias, Tuple, List, Optional
+import os
+import sys
+import json
+import hashlib
+from heapq import heapify, heappop, heappush
+from collections import OrderedDict, Counter
+from typing import TypeAlias, Tuple, List, Set, Dict, FrozenSet, Iterable, Iterator, Optional, TextIO
+try:
+    import numpy as np # Only needed for batch validation
+except ImportError:
+    np = None
 
 # Types
 RawPageData  : TypeAlias = str
@@ -108,9 +118,23 @@ RawSections  : TypeAlias = Tuple[RawPageRules,RawPageOrders]
 PageRule     : TypeAlias = Tuple[int,int]
 PageOrder    : TypeAlias = List[int]
 PageRules    : TypeAlias = List[PageRule]
+PageRuleIndex: TypeAlias = Set[PageRule]
+Reachability : TypeAlias = Dict[int,Set[int]] # Page -> every page ruled (transitively) after it
 PageOrders   : TypeAlias = List[PageOrder]
+PageSet      : TypeAlias = FrozenSet[int]
+RankedOrder  : TypeAlias = Tuple[Tuple[int,...],int] # (Correct Order, Middle Page)
+RankCache    : TypeAlias = OrderedDict[PageSet,Optional[RankedOrder]]
+RunningSums  : TypeAlias = Tuple[int,int] # (Part One, Part Two)
+RuleMatrix   : TypeAlias = 'np.ndarray'    # RuleMatrix[before,after] is True for each before|after rule
+ValidMask    : TypeAlias = 'np.ndarray'    # ValidMask[i] is True when page_orders[i] is valid
+
+# Exceptions
+class CyclicPageRule(Exception):
+    pass
 
 # Global Constants
+DEFAULT_CACHE_SIZE: int = 4096
+DEFAULT_BATCH_SIZE: int = 65536
 DEFAULT_INPUT: RawPageData = """
 47|53
 97|13
@@ -143,12 +167,107 @@ DEFAULT_INPUT: RawPageData = """
 """.strip('\n')
 
 # Classes
+class PageRuleStore():
+    # Dunder Methods
+    def __init__(self, page_rules: PageRules, strict: bool = False) -> None:
+        # Strict stores reject a rule that would close a cycle, others accept it and report has_cycle
+        self.strict      : bool          = strict
+        self.rules       : PageRuleIndex = set()
+        self.successors  : Reachability  = {}
+        self.reachable   : Reachability  = {}
+        for page_rule in page_rules:
+            self.add_rule(page_rule)
+
+    def __contains__(self, page_rule: PageRule) -> bool:
+        return page_rule in self.rules
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    # Public Methods
+    def precedes(self, page_a: int, page_b: int) -> bool:
+        return page_b in self.reachable.get(page_a, set())
+
+    def has_cycle(self) -> bool:
+        return any(page in reachable for page,reachable in self.reachable.items())
+
+    def add_rule(self, page_rule: PageRule) -> bool:
+        before, after = page_rule
+        if page_rule in self.rules:
+            return False
+        if self.strict and (before == after or self.precedes(after, before)):
+            raise CyclicPageRule(f'{before}|{after} contradicts the existing rules')
+        self.rules.add(page_rule)
+        self.successors.setdefault(before, set()).add(after)
+        self.successors.setdefault(after, set())
+        self.reachable.setdefault(after, set())
+        # Everything that reaches before (and before itself) now reaches after and beyond
+        gained: Set[int] = {after} | self.reachable[after]
+        for page,reachable in self.reachable.items():
+            if page == before or before in reachable:
+                reachable |= gained
+        self.reachable.setdefault(before, set()).update(gained)
+        return True
+
+    def remove_rule(self, page_rule: PageRule) -> bool:
+        before, after = page_rule
+        if page_rule not in self.rules:
+            return False
+        self.rules.remove(page_rule)
+        self.successors[before].discard(after)
+        # Only pages that reached before can have lost reachability, so only they are rebuilt
+        affected: List[int] = [page for page,reachable in self.reachable.items() if page == before or before in reachable]
+        for page in affected:
+            self.reachable[page] = self._search(page)
+        return True
+
+    def topological_order(self, page_order: PageOrder) -> PageOrder:
+        # Kahn's algorithm over the update's own rules, so a contradictory update can't be 'fixed'
+        # Ready pages leave in their original positions, so unrelated pages keep their relative order
+        position: Dict[int,int] = {}
+        for idx,page in enumerate(page_order):
+            position.setdefault(page, idx)
+        pages    : Set[int]     = set(position)
+        copies   : Counter[int] = Counter(page_order)
+        in_degree: Dict[int,int] = {page: sum((other,page) in self.rules for other in pages) for page in pages}
+        ready: List[Tuple[int,int]] = [(position[page],page) for page,degree in in_degree.items() if degree == 0]
+        heapify(ready)
+        ordered: PageOrder = []
+        while ready:
+            _, page = heappop(ready)
+            ordered.extend([page] * copies[page])
+            for after in self.successors.get(page, set()) & pages:
+                in_degree[after] -= 1
+                if in_degree[after] == 0:
+                    heappush(ready, (position[after],after))
+        if len(ordered) != len(page_order):
+            raise CyclicPageRule(f'Rules within {page_order} form a cycle')
+        return ordered
+
+    def check_acyclic(self, page_order: PageOrder) -> None:
+        self.topological_order(page_order)
+
+    # Private Methods
+    def _search(self, page: int) -> Set[int]:
+        reachable: Set[int] = set()
+        frontier: List[int] = list(self.successors.get(page, set()))
+        while frontier:
+            next_page = frontier.pop()
+            if next_page not in reachable:
+                reachable.add(next_page)
+                frontier.extend(self.successors.get(next_page, set()))
+        return reachable
+
 class Solver():
     # Dunder Methods
-    def __init__(self, raw_page_data: RawPageData) -> None:
+    def __init__(self, raw_page_data: RawPageData, cache_size: int = DEFAULT_CACHE_SIZE, cache_file: Optional[str] = None, strict_rules: bool = False) -> None:
         raw_sections    : RawSections = Solver._raw_sections(raw_page_data)
-        self.page_rules : PageRules   = Solver._page_rules(raw_sections[0])
-        self.page_orders: PageOrders = Solver._page_orders(raw_sections[1])
+        self.page_rules : PageRules     = Solver._page_rules(raw_sections[0])
+        self.rule_index : PageRuleStore = PageRuleStore(self.page_rules, strict=strict_rules)
+        self.page_orders: PageOrders    = Solver._page_orders(raw_sections[1])
+        self.cache_size : int           = cache_size
+        self.cache_file : Optional[str] = cache_file
+        self.rank_cache : RankCache     = Solver._load_cache(cache_file, Solver._rule_digest(self.page_rules))
 
     # Public Methods
     # PART ONE
@@ -162,6 +281,10 @@ class Solver():
             return None
 
     def validate(self, page_order: PageOrder) -> bool:
+        ranked_order = self.ranked_order(page_order)
+        if ranked_order is not None:
+            # Repeated page sets only cost a hash lookup and one sequence comparison
+            return tuple(page_order) == ranked_order[0]
         for page_rule in self.page_rules:
             match self.check(page_order, page_rule):
                 case True : continue
@@ -176,9 +299,15 @@ class Solver():
                 valid_orders.append(page_order)
         return valid_orders
 
-    def solve_part_one(self) -> None:
+    def solve_part_one(self, batch: bool = False) -> None:
         solved_sum = 0
-        for valid_order in self.valid_orders():
+        valid_orders: PageOrders = []
+        if batch:
+            valid_mask: ValidMask = self.batch_validate()
+            valid_orders = [page_order for page_order,valid in zip(self.page_orders,valid_mask) if valid]
+        else:
+            valid_orders = self.valid_orders()
+        for valid_order in valid_orders:
             idx = len(valid_order) // 2
             solved_sum += valid_order[idx]
         print(f'Solved 1: {solved_sum}')
@@ -192,47 +321,197 @@ class Solver():
         return invalid_orders
 
     def fix_order(self, page_order: PageOrder) -> None:
-        made_change = True
-        while made_change:
-            made_change = False
-            for page_rule in self.page_rules:
-                try:
-                    rule_before_idx: int = page_order.index(page_rule[0])
-                    rule_after_idx : int = page_order.index(page_rule[1])
-                    if rule_before_idx > rule_after_idx:
-                        page_order[rule_before_idx],page_order[rule_after_idx] = page_order[rule_after_idx],page_order[rule_before_idx]
-                        made_change = True
-                        break
-                except ValueError:
-                    continue
+        # One topological sort instead of swapping a pair and rescanning every rule
+        # (a comparator sort isn't safe here, pages without a rule between them compare equal)
+        page_order[:] = self.rule_index.topological_order(page_order)
+
+    def middle_page(self, page_order: PageOrder) -> int:
+        ranked_order = self.ranked_order(page_order)
+        if ranked_order is not None:
+            return ranked_order[1]
+        if self.rule_index.has_cycle():
+            # Predecessor counts mean nothing within a cycle, so the repair path raises instead
+            self.rule_index.check_acyclic(page_order)
+        # The fixed middle page is the one with exactly len//2 in-update pages ruled before it,
+        # but only when every pair has a rule (partly ordered sets must agree with fix_order)
+        idx = len(page_order) // 2
+        if self._is_fully_ordered(frozenset(page_order)):
+            for page in page_order:
+                predecessors = sum((other,page) in self.rule_index for other in page_order)
+                if predecessors == idx:
+                    return page
+        # Rules didn't pin down a middle page, so fall back to a full fix on a copy
+        fixed_order: PageOrder = page_order.copy()
+        self.fix_order(fixed_order)
+        return fixed_order[idx]
 
     def solve_part_two(self) -> None:
         solved_sum = 0
-        invalid_orders: PageOrders = self.invalid_orders()
-        for invalid_order in invalid_orders:
-            self.fix_order(invalid_order)
-            idx = len(invalid_order) // 2
-            solved_sum += invalid_order[idx]
+        for invalid_order in self.invalid_orders():
+            # Only the middle page is needed, so self.page_orders is left untouched
+            solved_sum += self.middle_page(invalid_order)
         print(f'Solved 2: {solved_sum}')
 
+    # RULES
+    def add_rule(self, page_rule: PageRule) -> bool:
+        added = self.rule_index.add_rule(page_rule)
+        if added:
+            self.page_rules.append(page_rule)
+            self.rank_cache.clear() # Cached orders were ranked under the old rules
+        return added
+
+    def remove_rule(self, page_rule: PageRule) -> bool:
+        removed = self.rule_index.remove_rule(page_rule)
+        if removed:
+            self.page_rules = [rule for rule in self.page_rules if rule != page_rule] # Input may repeat a rule
+            self.rank_cache.clear()
+        return removed
+
+    # STREAMING
+    @staticmethod
+    def from_rule_lines(raw_lines: TextIO, cache_size: int = DEFAULT_CACHE_SIZE) -> 'Solver':
+        # Consumes the rules section only, leaving the updates unread in raw_lines
+        raw_page_rules: List[str] = []
+        for line in raw_lines:
+            if line.strip() == '':
+                break
+            raw_page_rules.append(line.strip())
+        return Solver('\n'.join(raw_page_rules), cache_size=cache_size)
+
+    def stream(self, raw_page_orders: Iterable[str]) -> Iterator[RunningSums]:
+        # Memory stays bounded by the rules (and cache), not by the number of updates
+        part_one_sum, part_two_sum = 0, 0
+        for line in raw_page_orders:
+            if line.strip() == '':
+                continue
+            page_order: PageOrder = Solver._page_order(line)
+            if self.validate(page_order):
+                part_one_sum += page_order[len(page_order) // 2]
+            else:
+                part_two_sum += self.middle_page(page_order)
+            yield part_one_sum, part_two_sum
+
+    # BATCH
+    def rule_matrix(self, size: int) -> RuleMatrix:
+        rule_matrix: RuleMatrix = np.zeros((size,size), dtype=bool)
+        if len(self.page_rules) != 0:
+            before, after = np.array(self.page_rules).T
+            rule_matrix[before,after] = True
+        return rule_matrix
+
+    def batch_validate(self, page_orders: Optional[PageOrders] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> ValidMask:
+        # Page numbers are small, so every ordered pair in every update is checked with one matrix gather
+        if np is None:
+            raise ImportError('batch_validate requires numpy')
+        page_orders = self.page_orders if page_orders is None else page_orders
+        if len(page_orders) == 0:
+            return np.ones(0, dtype=bool)
+        lengths = np.array([len(page_order) for page_order in page_orders])
+        max_page = max(max(max(page_order) for page_order in page_orders), max((max(rule) for rule in self.page_rules), default=0))
+        pad_page = max_page + 1 # Has no rules, so padding never violates anything
+        rule_matrix: RuleMatrix = self.rule_matrix(pad_page + 1)
+        padded = np.full((len(page_orders),lengths.max()), pad_page, dtype=np.min_scalar_type(pad_page))
+        padded[np.arange(lengths.max()) < lengths[:,None]] = np.concatenate([np.array(page_order) for page_order in page_orders])
+        earlier_than_later = np.triu(np.ones((lengths.max(),lengths.max()), dtype=bool), k=1)
+        valid_mask: ValidMask = np.empty(len(page_orders), dtype=bool)
+        # Chunked so the (updates, len, len) gather stays bounded in memory
+        for start in range(0, len(page_orders), batch_size):
+            chunk = padded[start:start+batch_size]
+            # A later page that is ruled before an earlier page breaks the order
+            violations = rule_matrix[chunk[:,None,:],chunk[:,:,None]] & earlier_than_later
+            valid_mask[start:start+batch_size] = ~violations.any(axis=(1,2))
+        return valid_mask
+
+    # CACHE
+    def ranked_order(self, page_order: PageOrder) -> Optional[RankedOrder]:
+        # None means the rules don't fully order this page set, so the caller checks the rules instead
+        page_set: PageSet = frozenset(page_order)
+        if len(page_set) != len(page_order):
+            return None # Repeated pages would share a key with a different update, so they skip the cache
+        if page_set in self.rank_cache:
+            self.rank_cache.move_to_end(page_set)
+            return self.rank_cache[page_set]
+        ranked_order: Optional[RankedOrder] = None
+        if self._is_fully_ordered(page_set):
+            fixed_order: PageOrder = page_order.copy()
+            try:
+                self.fix_order(fixed_order)
+                ranked_order = tuple(fixed_order), fixed_order[len(fixed_order) // 2]
+            except CyclicPageRule:
+                pass # Validity never needs a repair, so cyclic page sets fall back to the rule scan
+        self.rank_cache[page_set] = ranked_order
+        if len(self.rank_cache) > self.cache_size:
+            self.rank_cache.popitem(last=False) # Evict the least recently used page set
+        return ranked_order
+
+    def save_cache(self) -> None:
+        if self.cache_file is None:
+            return
+        serialized: Dict[str,Optional[RankedOrder]] = {
+            ','.join(str(page) for page in sorted(page_set)): ranked_order
+            for page_set,ranked_order in self.rank_cache.items()
+        }
+        with open(self.cache_file,'w') as file:
+            # The rules are saved alongside, so a cache built under other rules is never reused
+            json.dump({'rules': Solver._rule_digest(self.page_rules), 'ranks': serialized}, file)
+
     # Private Methods
+    def _is_fully_ordered(self, page_set: PageSet) -> bool:
+        # Comparing against one cached order is only sound when every pair has a rule
+        return all(
+            (page_a,page_b) in self.rule_index or (page_b,page_a) in self.rule_index
+            for page_a in page_set for page_b in page_set if page_a < page_b
+        )
+
+    @staticmethod
+    def _rule_digest(page_rules: PageRules) -> str:
+        raw_page_rules: str = '\n'.join(f'{before}|{after}' for before,after in sorted(set(page_rules)))
+        return hashlib.sha256(raw_page_rules.encode()).hexdigest()
+
+    @staticmethod
+    def _load_cache(cache_file: Optional[str], rule_digest: str) -> RankCache:
+        rank_cache: RankCache = OrderedDict()
+        if cache_file is None or not os.path.exists(cache_file):
+            return rank_cache
+        with open(cache_file,'r') as file:
+            saved_cache = json.load(file)
+        if not isinstance(saved_cache, dict) or saved_cache.get('rules') != rule_digest:
+            return rank_cache # Saved under different rules (or an older format), so start empty
+        for raw_page_set,ranked_order in saved_cache['ranks'].items():
+            page_set: PageSet = frozenset(int(page) for page in raw_page_set.split(','))
+            rank_cache[page_set] = None if ranked_order is None else (tuple(ranked_order[0]),ranked_order[1])
+        return rank_cache
+
     @staticmethod
     def _raw_sections(raw_page_data: RawPageData) -> RawSections:
         raw_sections = raw_page_data.split('\n\n')
         raw_page_rules: RawPageRules = raw_sections[0]
-        raw_page_orders: RawPageOrders = raw_sections[1]
+        raw_page_orders: RawPageOrders = raw_sections[1] if len(raw_sections) > 1 else '' # Rules only when streaming
         return raw_page_rules,raw_page_orders
 
     @staticmethod
     def _page_rules(raw_page_rules: RawPageRules) -> PageRules:
         return [(int(line.split('|')[0]), int(line.split('|')[1])) for line in raw_page_rules.strip().splitlines()]
 
+    @staticmethod
+    def _page_order(raw_page_order: str) -> PageOrder:
+        return [int(num) for num in raw_page_order.strip().split(',')]
+
     @staticmethod
     def _page_orders(raw_page_orders: RawPageOrders) -> PageOrders:
-        return [[int(num) for num in line.split(',')] for line in raw_page_orders.strip().splitlines()]
+        return [Solver._page_order(line) for line in raw_page_orders.strip().splitlines()]
 
 # Execute
-if __name__ == "__main__":
+if __name__ == "__main__" and '--stream' in sys.argv:
+    # Pipe the input through instead: python main.py --stream < input.txt
+    print("Initialize Solver...")
+    solver: Solver = Solver.from_rule_lines(sys.stdin)
+    running_sums: RunningSums = 0,0
+    for running_sums in solver.stream(sys.stdin):
+        pass
+    print(f'Solved 1: {running_sums[0]}')
+    print(f'Solved 2: {running_sums[1]}')
+elif __name__ == "__main__":
     with open('input.txt','r') as file:
         print("Initialize Input...")
         input = file.read().strip('\n')
@@ -245,3 +524,4 @@ if __name__ == "__main__":
 
         solver.solve_part_one()
         solver.solve_part_two()
+        solver.save_cache()
@@ -1,31 +1,38 @@
 # Imports
 import sys
-from enum import Enum
 #from time import sleep
-from copy import deepcopy
-from itertools import product
-from typing import TypeAlias, List, Tuple, Set, Optional, Any, cast
+from bisect import bisect_left, bisect_right, insort
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import defaultdict
+from typing import TypeAlias, List, Dict, Set, Tuple, Iterable, Iterator, Optional
 
 # Types
 RawGameBoard  : TypeAlias = str
-RawGameMatrix : TypeAlias = List[List[str]]
-GameBoard     : TypeAlias = List[List['Cell']]
-Position      : TypeAlias = Tuple[int,int]
+Board         : TypeAlias = bytearray # Flat rows*cols board, index = row*cols + col
+StateSet      : TypeAlias = bytearray # Bitset of (position*4 + direction) guard states
 Vector        : TypeAlias = Tuple[int,int]
-PlayerData    : TypeAlias = Optional[Tuple['Player',Position]]
+Position      : TypeAlias = Tuple[int,int]
+Interval      : TypeAlias = Tuple[int,int]            # Inclusive (low, high)
+Segment       : TypeAlias = Tuple[Position,Position] # Straight walk from start to end, inclusive
+RockIndex     : TypeAlias = Dict[int,List[int]]      # Sparse RockTable, only rows/cols holding rocks
+PlayerData    : TypeAlias = Optional[Tuple[int,int]] # (Position, Direction)
+RockTable     : TypeAlias = List[List[int]]          # Sorted rock cols per row, or rock rows per col
+FirstVisit    : TypeAlias = Tuple[int,int,int]       # (Cell, Position, Direction) just before entering Cell
 Task          : TypeAlias = bool
 
-# Exceptions
-class RepeatRock(Exception):
-    pass
-class EndOfGame(Exception):
-    pass
-
 # Global Constants
 ROCK_CHAR    : str          = '#'
 EMPTY_CHAR   : str          = '.'
 VISITED_CHAR : str          = 'X'
 STEP_DELAY   : float        = 0.2
+EMPTY        : int          = 0
+ROCK         : int          = 1
+# Directions are integer codes, turning right is (direction + 1) % 4
+NORTH, EAST, SOUTH, WEST    = 0, 1, 2, 3
+DIRECTION_CHARS: str        = '^>v<'
+VECTORS: Tuple[Vector, ...] = ((-1,0), (0,1), (1,0), (0,-1))
+CHUNK_SIZE   : int          = 128 # Candidate obstructions per worker task
 DEFAULT_INPUT: RawGameBoard = '''
 ..#.....
 .......#
@@ -38,165 +45,346 @@ DEFAULT_INPUT: RawGameBoard = '''
 '''.strip("\n")
 
 # Helpers (Structs, Methods, Etc)
-class Direction(Enum):
-    NORTH = '^'
-    SOUTH = 'v'
-    EAST  = '>'
-    WEST  = '<'
-
 def input_file() -> RawGameBoard:
     with open('input.txt','r') as file:
         return file.read().strip('\n')
 
-def matrix_string(matrix: List[List[Any]]) -> str:
-    as_string: str = ""
-    for list in matrix:
-        for cell in list:
-            as_string += f'{cell}'
-        as_string += '\n'
-    return as_string
+def empty_state_set(cells: int) -> StateSet:
+    return bytearray((cells * 4 + 7) // 8)
 
-# Helper Classes
-class Cell():
-    value:            str  = EMPTY_CHAR
-    can_visit:        bool = True
-    has_been_visited: bool = False
-    def __init__(self,has_been_visited:bool=False) -> None:
-        self.has_been_visited = has_been_visited
-        if has_been_visited:
-            self.value = VISITED_CHAR
-    def __str__(self) -> str:
-        return self.value
-
-class Rock(Cell):
-    value    : str  = ROCK_CHAR
-    can_visit: bool = False
-    def __init__(self) -> None:
-        self.directions: Set[Direction] = set()
+def next_stop(row: int, col: int, direction: int, row_rocks: List[int], col_rocks: List[int], rows: int, cols: int) -> Tuple[int,int,bool]:
+    # Where the guard stops: right before the next rock, or on the edge it walks off (exits=True)
+    match direction:
+        case 0: # NORTH
+            idx = bisect_left(col_rocks, row)
+            return (0, col, True) if idx == 0 else (col_rocks[idx-1] + 1, col, False)
+        case 1: # EAST
+            idx = bisect_right(row_rocks, col)
+            return (row, cols - 1, True) if idx == len(row_rocks) else (row, row_rocks[idx] - 1, False)
+        case 2: # SOUTH
+            idx = bisect_right(col_rocks, row)
+            return (rows - 1, col, True) if idx == len(col_rocks) else (col_rocks[idx] - 1, col, False)
+        case _: # WEST
+            idx = bisect_left(row_rocks, col)
+            return (row, 0, True) if idx == 0 else (row, row_rocks[idx-1] + 1, False)
 
-class Player(Cell):
-    has_been_visited: bool = True
-    def __init__(self, direction:Direction) -> None:
-        self.value = direction.value
-        self.direction = direction
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for low, high in sorted(intervals):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = merged[-1][0], max(merged[-1][1], high)
+        else:
+            merged.append((low, high))
+    return merged
 
 # Main Class
 class Solver():
     # Dunder Methods
     def __init__(self, raw_game_board: RawGameBoard):
-        raw_game_matrix = Solver._raw_game_matrix(raw_game_board)
-        self.game_board = Solver._game_board(raw_game_matrix)
-        player_data     = Solver._player_position(self.game_board)
-        self.obstruction_point: int = 0
-        if player_data is not None :
-            self.player,self.position = player_data
+        lines = raw_game_board.splitlines()
+        self._load(Solver._game_board(lines), len(lines), len(lines[0]), Solver._player_position(lines))
     def __str__(self) -> str:
-        return matrix_string(self.game_board)
+        as_string: str = ""
+        for row in range(self.rows):
+            for col in range(self.cols):
+                position = row * self.cols + col
+                if position == self.start_position:
+                    as_string += DIRECTION_CHARS[self.start_direction]
+                elif self.game_board[position] == ROCK:
+                    as_string += ROCK_CHAR
+                else:
+                    as_string += VISITED_CHAR if self.visited[position] else EMPTY_CHAR
+            as_string += '\n'
+        return as_string
     # Public Methods
+    @staticmethod
+    def from_board(game_board: Board, rows: int, cols: int, player_data: PlayerData) -> 'Solver':
+        solver: Solver = Solver.__new__(Solver)
+        solver._load(game_board, rows, cols, player_data)
+        return solver
+    def reset(self, position: Optional[int] = None, direction: Optional[int] = None, track_visited: bool = True) -> None:
+        self.position     : int      = self.start_position if position is None else position
+        self.direction    : int      = self.start_direction if direction is None else direction
+        self.looped       : bool     = False
+        self.track_visited: bool     = track_visited
+        self.turns        : Set[int] = set()
+        if track_visited:
+            # Loop trials skip both grid-sized buffers and only remember the states they turn in
+            self.visited: Board    = bytearray(self.rows * self.cols)
+            self.states : StateSet = empty_state_set(self.rows * self.cols)
     def step(self) -> Task:
-        vector: Vector = 0,0
-        match self.player.direction:
-            case Direction.NORTH: vector = -1, 0
-            case Direction.SOUTH: vector =  1, 0
-            case Direction.EAST : vector =  0, 1
-            case Direction.WEST : vector =  0,-1
-        try:
-            rows,cols = len(self.game_board),len(self.game_board[0])
-            while self.game_board[self.position[0]+vector[0]][self.position[1]+vector[1]].can_visit:
-                self.game_board[self.position[0]][self.position[1]] = Cell(True)
-                self.game_board[self.position[0]+vector[0]][self.position[1]+vector[1]] = self.player
-                self.position = self.position[0]+vector[0], self.position[1]+vector[1]
-                x,y = self.position[0]+vector[0],self.position[1]+vector[1]
-                if isinstance(self.game_board[x][y],Rock):
-                    rock: Rock = cast(Rock,self.game_board[x][y])
-                    if self.player.direction in rock.directions:
-                        self.obstruction_point += 1
-                        raise RepeatRock
-                    rock.directions.add(self.player.direction)
-                if not (0 <= x < rows) or not (0 <= y < cols):
-                    raise EndOfGame
-        except (IndexError, EndOfGame,RepeatRock):
+        # Jumps straight to the next rock, then turns; False once the guard leaves or repeats a state
+        position, direction = self.position, self.direction
+        state = position * 4 + direction
+        if self.track_visited:
+            if self.states[state >> 3] & (1 << (state & 7)):
+                self.looped = True
+                return False
+            self.states[state >> 3] |= 1 << (state & 7)
+        elif state in self.turns:
+            self.looped = True
             return False
-        match self.player.direction:
-            case Direction.NORTH: self.player.value = Direction.EAST.value ; self.player.direction = Direction.EAST
-            case Direction.SOUTH: self.player.value = Direction.WEST.value ; self.player.direction = Direction.WEST
-            case Direction.EAST : self.player.value = Direction.SOUTH.value; self.player.direction = Direction.SOUTH
-            case Direction.WEST : self.player.value = Direction.NORTH.value; self.player.direction = Direction.NORTH
+        else:
+            self.turns.add(state)
+        row, col = divmod(position, self.cols)
+        row, col, exits = next_stop(row, col, direction, self.row_rocks[row], self.col_rocks[col], self.rows, self.cols)
+        end = row * self.cols + col
+        if self.track_visited:
+            stride = 1 if direction in (EAST, WEST) else self.cols
+            low, high = min(position, end), max(position, end)
+            self.visited[low:high+1:stride] = b'\x01' * ((high - low) // stride + 1)
+        self.position = end
+        if exits:
+            return False
+        self.direction = (direction + 1) % 4
         return True
+    def place_rock(self, cell: int) -> None:
+        # Only this rock's row and column lookups change
+        row, col = divmod(cell, self.cols)
+        self.game_board[cell] = ROCK
+        insort(self.row_rocks[row], col)
+        insort(self.col_rocks[col], row)
+    def remove_rock(self, cell: int) -> None:
+        row, col = divmod(cell, self.cols)
+        self.game_board[cell] = EMPTY
+        self.row_rocks[row].remove(col)
+        self.col_rocks[col].remove(row)
+    def patrol(self, position: Optional[int] = None, direction: Optional[int] = None, track_visited: bool = True) -> bool:
+        # True if the guard walks off the map, False if it gets stuck in a loop
+        self.reset(position, direction, track_visited)
+        while self.step():
+            pass
+        return not self.looped
+    def first_visits(self) -> List[FirstVisit]:
+        # Walks the unobstructed patrol once, noting the guard's state right before each new cell
+        rows, cols, board = self.rows, self.cols, self.game_board
+        position, direction = self.start_position, self.start_direction
+        row, col = divmod(position, cols)
+        seen: Board = bytearray(rows * cols)
+        seen[position] = 1
+        states: StateSet = empty_state_set(rows * cols)
+        first_visits: List[FirstVisit] = []
+        while True:
+            state = position * 4 + direction
+            if states[state >> 3] & (1 << (state & 7)):
+                return first_visits
+            states[state >> 3] |= 1 << (state & 7)
+            d_row, d_col = VECTORS[direction]
+            if not (0 <= row + d_row < rows and 0 <= col + d_col < cols):
+                return first_visits
+            next_position = (row + d_row) * cols + col + d_col
+            if board[next_position] == ROCK:
+                direction = (direction + 1) % 4
+                continue
+            if not seen[next_position]:
+                seen[next_position] = 1
+                first_visits.append((next_position, position, direction))
+            row, col, position = row + d_row, col + d_col, next_position
     def solve_part_one(self) -> None:
-        count: int = 0
-        running: bool = True
-        while running:
-            running = self.step()
-            count += 1
-        rows,cols,count = len(self.game_board),len(self.game_board[0]),0
-        for row,col in product(range(rows),range(cols)):
-            if self.game_board[row][col].has_been_visited:
-                count += 1
+        self.patrol()
+        count: int = sum(self.visited)
         print(f'Solution: {count} visited cells')
-    def solve_part_two(self) -> None:
-        rows, cols = len(self.game_board), len(self.game_board[0])
-        total_cells = rows * cols
-        current = 0
-        cached_player: Player = deepcopy(self.player)
-        cached_position: Position = deepcopy(self.position)
+    def solve_part_two(self, parallel: bool = False, max_workers: Optional[int] = None) -> None:
+        # Only cells on the original patrol can change it, and each trial resumes just before that cell
+        first_visits: List[FirstVisit] = self.first_visits()
+        total_cells = len(first_visits)
         print('\n' * 4)
-        for row, col in product(range(rows), range(cols)):
-            current += 1
-            cell = self.game_board[row][col]
-            progress = int(50 * current / total_cells)  # 50 character progress bar
-            percentage = (current / total_cells) * 100
-            status_lines = [
-                f'\rProgress: [{"|" * progress}{" " * (50-progress)}] {percentage:.1f}%',
-                f'Testing position: ({row}, {col})',
-                f'Cells checked: {current}/{total_cells}',
-                f'Obstruction Points Found: {self.obstruction_point}'
-            ]
-            sys.stdout.write('\033[F' * 4)
-            for line in status_lines:
-                sys.stdout.write('\033[K' + line + '\n')
-            sys.stdout.flush()
-            if isinstance(cell, Player) or isinstance(cell, Rock):
-                continue
-            cached_game: GameBoard = deepcopy(self.game_board)
-            self.game_board[row][col] = Rock()
-            while self.step():
-                   pass
-            self.player = cached_player
-            self.position = cached_position
-            self.game_board = cached_game
+        if parallel:
+            self.obstruction_point += self._count_loops_in_parallel(first_visits, max_workers)
+        else:
+            for current, (cell, position, direction) in enumerate(first_visits, 1):
+                self._show_progress(current, total_cells, cell)
+                self.place_rock(cell)
+                if not self.patrol(position, direction, track_visited=False):
+                    self.obstruction_point += 1
+                self.remove_rock(cell)
+        self.reset()
         print('\n' * 4)
         print(f'Solution: {self.obstruction_point}')
     # Private Methods
+    def _load(self, game_board: Board, rows: int, cols: int, player_data: PlayerData) -> None:
+        self.rows, self.cols = rows, cols
+        self.game_board: Board = game_board
+        self.row_rocks, self.col_rocks = Solver._rock_tables(self.game_board, self.rows, self.cols)
+        self.obstruction_point: int = 0
+        if player_data is not None:
+            self.start_position, self.start_direction = player_data
+        self.reset()
+    def _show_progress(self, current: int, total_cells: int, cell: int) -> None:
+        row, col = divmod(cell, self.cols)
+        progress = int(50 * current / total_cells)  # 50 character progress bar
+        percentage = (current / total_cells) * 100
+        status_lines = [
+            f'\rProgress: [{"|" * progress}{" " * (50-progress)}] {percentage:.1f}%',
+            f'Testing position: ({row}, {col})',
+            f'Cells checked: {current}/{total_cells}',
+            f'Obstruction Points Found: {self.obstruction_point}'
+        ]
+        sys.stdout.write('\033[F' * 4)
+        for line in status_lines:
+            sys.stdout.write('\033[K' + line + '\n')
+        sys.stdout.flush()
+    def _count_loops_in_parallel(self, first_visits: List[FirstVisit], max_workers: Optional[int]) -> int:
+        # The board is published once, workers only receive chunks of candidate obstructions
+        shared = SharedMemory(create=True, size=len(self.game_board))
+        loops = 0
+        try:
+            shared.buf[:len(self.game_board)] = self.game_board
+            player_data: PlayerData = self.start_position, self.start_direction
+            chunks = [first_visits[i:i+CHUNK_SIZE] for i in range(0, len(first_visits), CHUNK_SIZE)]
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_board,
+                                     initargs=(shared.name, self.rows, self.cols, player_data)) as executor:
+                futures = [executor.submit(_count_loops, chunk) for chunk in chunks]
+                for current, future in enumerate(as_completed(futures), 1):
+                    loops += future.result()
+                    checked = min(current * CHUNK_SIZE, len(first_visits))
+                    self._show_progress(checked, len(first_visits), first_visits[checked-1][0])
+        finally:
+            shared.close()
+            shared.unlink()
+        return loops
     @staticmethod
-    def _raw_game_matrix(raw_game_board: RawGameBoard) -> RawGameMatrix:
-        return [[cell for cell in list(lines)] for lines in raw_game_board.splitlines()]
-    @staticmethod
-    def _empty_game_board(rows: int, cols: int) -> GameBoard:
-        return [[Cell() for _ in range(rows)] for _ in range(cols)]
+    def _game_board(lines: List[str]) -> Board:
+        return bytearray(ROCK if cell == ROCK_CHAR else EMPTY for line in lines for cell in line)
     @staticmethod
-    def _game_board(raw_game_matrix: RawGameMatrix) -> GameBoard:
-        rows, cols = len(raw_game_matrix),len(raw_game_matrix[0])
-        game_board: GameBoard = Solver._empty_game_board(rows,cols)
-        for row,col in product(range(rows),range(cols)):
-            match raw_game_matrix[row][col]:
-                case Direction.NORTH.value      : game_board[row][col] = Player(Direction.NORTH)
-                case Direction.SOUTH.value      : game_board[row][col] = Player(Direction.SOUTH)
-                case Direction.EAST.value       : game_board[row][col] = Player(Direction.EAST )
-                case Direction.WEST.value       : game_board[row][col] = Player(Direction.WEST )
-                case value if value == ROCK_CHAR: game_board[row][col] = Rock()
-                case _                          : continue # It's already an empty cell
-        return game_board
+    def _rock_tables(game_board: Board, rows: int, cols: int) -> Tuple[RockTable,RockTable]:
+        row_rocks: RockTable = [[] for _ in range(rows)]
+        col_rocks: RockTable = [[] for _ in range(cols)]
+        for position, cell in enumerate(game_board):
+            if cell == ROCK:
+                row, col = divmod(position, cols)
+                row_rocks[row].append(col) # Filled in position order, so already sorted
+                col_rocks[col].append(row)
+        return row_rocks, col_rocks
     @staticmethod
-    def _player_position(game_board: GameBoard) -> PlayerData:
-        rows, cols = len(game_board),len(game_board[0])
-        for row,col in product(range(rows),range(cols)):
-            if isinstance(game_board[row][col],Player):
-                player  : Player   = cast(Player,game_board[row][col])
-                position: Position = row,col
-                return player,position
+    def _player_position(lines: List[str]) -> PlayerData:
+        for row, line in enumerate(lines):
+            for col, cell in enumerate(line):
+                if cell in DIRECTION_CHARS:
+                    return row * len(line) + col, DIRECTION_CHARS.index(cell)
         return None
 
+# Sparse Engine
+class SparseSolver():
+    # Only rock coordinates are stored, so huge and mostly empty maps never allocate the grid
+    # Dunder Methods
+    def __init__(self, rows: int, cols: int, rocks: Iterable[Position], start: Position, start_direction: int = NORTH) -> None:
+        self.rows, self.cols = rows, cols
+        self.row_rocks: RockIndex = {}
+        self.col_rocks: RockIndex = {}
+        for row, col in rocks:
+            self.row_rocks.setdefault(row, []).append(col)
+            self.col_rocks.setdefault(col, []).append(row)
+        for rocks_list in (*self.row_rocks.values(), *self.col_rocks.values()):
+            rocks_list.sort()
+        self.start, self.start_direction = start, start_direction
+        self.obstruction_point: int = 0
+    # Public Methods
+    @staticmethod
+    def from_raw(raw_game_board: RawGameBoard) -> 'SparseSolver':
+        lines = raw_game_board.splitlines()
+        rocks: List[Position] = []
+        start, start_direction = (0, 0), NORTH
+        for row, line in enumerate(lines):
+            for col, cell in enumerate(line):
+                if cell == ROCK_CHAR:
+                    rocks.append((row, col))
+                elif cell in DIRECTION_CHARS:
+                    start, start_direction = (row, col), DIRECTION_CHARS.index(cell)
+        return SparseSolver(len(lines), len(lines[0]), rocks, start, start_direction)
+    def place_rock(self, cell: Position) -> None:
+        insort(self.row_rocks.setdefault(cell[0], []), cell[1])
+        insort(self.col_rocks.setdefault(cell[1], []), cell[0])
+    def remove_rock(self, cell: Position) -> None:
+        # Emptied rows and columns are dropped, so trial rocks never grow the index
+        row, col = cell
+        self.row_rocks[row].remove(col)
+        if not self.row_rocks[row]:
+            del self.row_rocks[row]
+        self.col_rocks[col].remove(row)
+        if not self.col_rocks[col]:
+            del self.col_rocks[col]
+    def patrol(self, position: Optional[Position] = None, direction: Optional[int] = None) -> Tuple[List[Segment],bool]:
+        # (Segments walked, True if the guard walks off the map)
+        (row, col), direction = position or self.start, self.start_direction if direction is None else direction
+        segments: List[Segment] = []
+        states: Set[Tuple[int,int,int]] = set()
+        while (row, col, direction) not in states:
+            states.add((row, col, direction))
+            end_row, end_col, exits = next_stop(row, col, direction, self.row_rocks.get(row, []), self.col_rocks.get(col, []), self.rows, self.cols)
+            segments.append(((row, col), (end_row, end_col)))
+            if exits:
+                return segments, True
+            row, col, direction = end_row, end_col, (direction + 1) % 4
+        return segments, False
+    def visited_count(self, segments: List[Segment]) -> int:
+        # |Rows ∪ Cols| = |Rows| + |Cols| - |Rows ∩ Cols|, all from merged intervals
+        row_intervals: Dict[int,List[Interval]] = defaultdict(list)
+        col_intervals: Dict[int,List[Interval]] = defaultdict(list)
+        for (start_row, start_col), (end_row, end_col) in segments:
+            if start_row == end_row:
+                row_intervals[start_row].append((min(start_col, end_col), max(start_col, end_col)))
+            else:
+                col_intervals[start_col].append((min(start_row, end_row), max(start_row, end_row)))
+        merged_rows = {row: merge_intervals(intervals) for row, intervals in row_intervals.items()}
+        merged_cols = {col: merge_intervals(intervals) for col, intervals in col_intervals.items()}
+        count = sum(high - low + 1 for intervals in (*merged_rows.values(), *merged_cols.values()) for low, high in intervals)
+        interval_rows = sorted(merged_rows)
+        for col, intervals in merged_cols.items():
+            for low, high in intervals:
+                for row in interval_rows[bisect_left(interval_rows, low):bisect_right(interval_rows, high)]:
+                    row_interval_list = merged_rows[row]
+                    idx = bisect_right(row_interval_list, (col, self.cols)) - 1
+                    if idx >= 0 and row_interval_list[idx][0] <= col <= row_interval_list[idx][1]:
+                        count -= 1
+        return count
+    def first_visits(self) -> Iterator[Tuple[Position,Position,int]]:
+        # (Cell, Position, Direction) for each new cell on the patrol, like Solver.first_visits
+        seen: Set[Position] = {self.start}
+        direction = self.start_direction
+        for (row, col), (end_row, end_col) in self.patrol()[0]:
+            d_row, d_col = VECTORS[direction]
+            while (row, col) != (end_row, end_col):
+                cell = row + d_row, col + d_col
+                if cell not in seen:
+                    seen.add(cell)
+                    yield cell, (row, col), direction
+                row, col = cell
+            direction = (direction + 1) % 4
+    def solve_part_one(self) -> None:
+        count: int = self.visited_count(self.patrol()[0])
+        print(f'Solution: {count} visited cells')
+    def solve_part_two(self) -> None:
+        for cell, position, direction in self.first_visits():
+            self.place_rock(cell)
+            if not self.patrol(position, direction)[1]:
+                self.obstruction_point += 1
+            self.remove_rock(cell)
+        print(f'Solution: {self.obstruction_point}')
+
+# Parallel Workers
+_worker_solver: Optional[Solver] = None
+
+def _attach_board(shared_name: str, rows: int, cols: int, player_data: PlayerData) -> None:
+    # Each worker reads the shared board once into its own overlay, so its temporary rocks stay private
+    global _worker_solver
+    shared = SharedMemory(name=shared_name)
+    try:
+        _worker_solver = Solver.from_board(bytearray(shared.buf[:rows * cols]), rows, cols, player_data)
+    finally:
+        shared.close()
+
+def _count_loops(first_visits: List[FirstVisit]) -> int:
+    assert _worker_solver is not None, '_attach_board must run first'
+    solver: Solver = _worker_solver
+    loops = 0
+    for cell, position, direction in first_visits:
+        solver.place_rock(cell)
+        if not solver.patrol(position, direction, track_visited=False):
+            loops += 1
+        solver.remove_rock(cell)
+    return loops
+
 # Execution
 if __name__ == "__main__":
     print('Initialize Input...')
@@ -210,4 +398,4 @@ if __name__ == "__main__":
 
     # Run one or the other...
     #solver.solve_part_one()
-    solver.solve_part_two()
+    solver.solve_part_two() # parallel=True spreads the candidates across a process pool
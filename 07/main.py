@@ -1,10 +1,16 @@
 # Imports
+import os
 import sys
+import json
+import time
 from enum import Enum
-from itertools import product
-from typing import TypeAlias, List, Tuple, Dict, Iterator
-from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
+from functools import lru_cache
+from typing import TypeAlias, List, Tuple, Dict, Set, Any, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+try:
+    import numpy as np # Only needed for the vectorized engine
+except ImportError:
+    np = None
 
 # Types
 InputData : TypeAlias = str
@@ -12,12 +18,20 @@ InputLine : TypeAlias = str
 Problems  : TypeAlias = List['Problem']
 Equation  : TypeAlias = List[int]
 Operations: TypeAlias = List['Operation']
+IndexedLine: TypeAlias = Tuple[int,InputLine]   # Lets results come back out of order
+CacheEntry : TypeAlias = Dict[str,Any]          # {'valid': bool, 'operations': '+*|', 'count': Optional[int]}
+EquationCache: TypeAlias = Dict[str,CacheEntry] # Keyed by (target, operands, operator set)
 
 # Exceptions
 # Didn't feel the need to in this context
 # Dataset is already pre-verified and we're optimizing for it
 
 # Global Constants
+INT64_MAX    : int       = 2**63 - 1
+POWERS_OF_TEN: List[int] = [10**digits for digits in range(20)]
+CHUNK_SIZE   : int       = 16  # Lines per worker task
+REDRAW_DELAY : float     = 0.1 # Seconds between progress redraws
+CACHE_FILE   : str       = 'cache.json'
 DEFAULT_INPUT: InputData = """
 190: 10 19
 3267: 81 40 27
@@ -38,18 +52,6 @@ def get_input_data(use_official_data=False) -> InputData:
             input_data = file.read().strip('\n')
     return input_data
 
-def eval_l2r(equation_string: str) -> int:
-    op_map = {op.value[0]: op.value[1] for op in Operation.ALL()}
-    num_string = equation_string
-    for op in op_map.keys():
-        num_string = num_string.replace(op, ' ')
-    numbers = [int(n) for n in num_string.split()]
-    operators = [op for op in equation_string if op in op_map.keys()]
-    result = numbers[0]
-    for i in range(len(operators)):
-        result = op_map[operators[i]](result, numbers[i + 1])
-    return int(result)
-
 # Just to help with Progression Visualization for Longer Datasets
 def create_buffer(stats: Dict[str,str]) -> None:
     print((len(stats) + 10) * '\n')
@@ -88,7 +90,26 @@ class Operation(Enum):
         return [Operation.ADD, Operation.MUL, Operation.CON]
     @staticmethod
     def ALL() -> Operations:
-        return Operation.P2() # Set ALL to Current Part
+        return Operation.P2() # Default set, Problem and Solver take the set to use
+    @staticmethod
+    def from_symbol(symbol: str) -> 'Operation':
+        return next(operation for operation in Operation if operation.value[0] == symbol)
+    def __reduce_ex__(self, protocol: int):
+        # The values hold lambdas, so members travel to and from worker processes by name
+        return getattr, (Operation, self.name)
+    def undo(self, solution: int, value: int) -> Optional[int]:
+        # What the left side must have been for `left <op> value == solution`, None if impossible
+        # Operands are non-negative, so nothing can shrink back below the value
+        match self:
+            case Operation.ADD:
+                return solution - value if solution >= value else None
+            case Operation.MUL:
+                return solution // value if value != 0 and solution % value == 0 else None
+            case Operation.CON:
+                shift = 10 ** len(str(value))
+                return (solution - value) // shift if solution >= value and (solution - value) % shift == 0 else None
+            case _:
+                return None
 
 class Problem():
     # Properties
@@ -96,14 +117,23 @@ class Problem():
     solution:   int        = 0
     equation:   Equation   = []
     operations: Operations = []
+    operation_set: Operations = []
+    valid_count: int       = 0
 
     # Dunder Methods
-    def __init__(self, input_line: InputLine) -> None:
+    def __init__(self, input_line: InputLine, vectorized: bool = False, counted: bool = False, operation_set: Optional[Operations] = None) -> None:
         list_values: List[int] = Problem._list_values(input_line)
         self.solution = list_values[0]
         self.equation = list_values[1:]
+        self.operation_set = Operation.ALL() if operation_set is None else operation_set
         self.operations = [Operation.NOF for _ in range(len(self.equation)-1)]
-        valid_operations = Problem._valid_operations(self.solution, self.equation)
+        if counted:
+            self.valid_count = self.count_valid_operations()
+        if vectorized:
+            # Only answers validity, so the operations are left as NOF
+            self.is_valid = len(self.equation) > 1 and Problem._reachable(self.solution, self.equation, self.operation_set)
+            return
+        valid_operations = Problem._valid_operations(self.solution, self.equation, self.operation_set)
         self.is_valid = len(valid_operations) > 0
         if self.is_valid:
             self.operations = valid_operations
@@ -114,15 +144,61 @@ class Problem():
         return f'{validity_string} {self.solution}={equation_string}'
 
     # Public Methods
+    def count_valid_operations(self) -> int:
+        # How many operation assignments reach the solution, without enumerating them
+        operations: Operations = self.operation_set
+        if len(self.equation) < 2:
+            return 0
+        # Memoized over (index, value) so shared sub-problems are only counted once
+        @lru_cache(maxsize=None)
+        def count(index: int, solution: int) -> int:
+            if index == 0:
+                return 1 if solution == self.equation[0] else 0
+            value = self.equation[index]
+            total = 0
+            for operation in operations:
+                if operation == Operation.MUL and value == 0 and solution == 0:
+                    total += len(operations) ** (index-1) # Every assignment before a zero product works
+                    continue
+                left = operation.undo(solution, value)
+                if left is not None:
+                    total += count(index-1, left)
+            return total
+        return count(len(self.equation)-1, self.solution)
+    @staticmethod
+    def cost(input_line: InputLine, operation_set: Operations) -> int:
+        # Worst-case search size, ops^(len-1)
+        return len(operation_set) ** (len(Problem._list_values(input_line)) - 2)
+    @staticmethod
+    def cache_key(input_line: InputLine, operation_set: Operations) -> str:
+        list_values: List[int] = Problem._list_values(input_line)
+        operands = ' '.join(str(value) for value in list_values[1:])
+        return f'{list_values[0]}:{operands}:{"".join(operation.value[0] for operation in operation_set)}'
+    def cache_entry(self) -> CacheEntry:
+        return {
+            'valid': self.is_valid,
+            'operations': ''.join(operation.value[0] for operation in self.operations),
+            # An invalid line always counts 0, a valid one is only known if it was counted
+            'count': self.valid_count if self.valid_count or not self.is_valid else None,
+        }
+    @staticmethod
+    def from_cache(input_line: InputLine, operation_set: Operations, cache_entry: CacheEntry) -> 'Problem':
+        # Rebuilds a solved Problem without solving it again
+        problem: Problem = Problem.__new__(Problem)
+        list_values: List[int] = Problem._list_values(input_line)
+        problem.solution = list_values[0]
+        problem.equation = list_values[1:]
+        problem.operation_set = operation_set
+        problem.is_valid = cache_entry['valid']
+        problem.operations = [Operation.from_symbol(symbol) for symbol in cache_entry['operations']]
+        problem.valid_count = cache_entry['count'] or 0
+        return problem
 
     # Private Methods
     @staticmethod
     def _list_values(input_line: InputLine) -> List[int]:
         return [int(num) for num in input_line.replace(':','').split(' ')]
     @staticmethod
-    def _possible_operations(length: int) -> Iterator[Tuple[Operation, ...]]:
-        return product(Operation.ALL(), repeat=length)
-    @staticmethod
     def _equation_string(equation: Equation, operations: Operations) -> str:
         equation_string = ""
         for i,e in enumerate(equation):
@@ -131,49 +207,210 @@ class Problem():
             equation_string += f'{e}'
         return equation_string
     @staticmethod
-    def _valid_operations(solution: int, equation: List[int]) -> Operations:
-        valid_operations: List[Operations] = []
-        for operation in Problem._possible_operations(len(equation)-1):
-             if solution == eval_l2r(Problem._equation_string(equation,list(operation))):
-                 valid_operations.append(list(operation))
-                 break # Early because we need only one, for now.
-        # Return List[Operations] if we need all valid_operation sets.
-        return [] if len(valid_operations) == 0 else valid_operations[0]
+    def _valid_operations(solution: int, equation: List[int], operation_set: Operations) -> Operations:
+        # Works backward from the solution, so a failed undo prunes every combination behind it
+        valid_operations = Problem._unwind(solution, equation, len(equation)-1, operation_set)
+        return [] if valid_operations is None else valid_operations
+    @staticmethod
+    def _unwind(solution: int, equation: List[int], index: int, operations: Operations) -> Optional[Operations]:
+        if index == 0:
+            return [] if solution == equation[0] else None
+        value = equation[index]
+        for operation in operations:
+            if operation == Operation.MUL and value == 0 and solution == 0:
+                # Anything times zero works, so any operations will do for the rest
+                return [operations[0] for _ in range(index-1)] + [operation]
+            left = operation.undo(solution, value)
+            if left is None:
+                continue
+            valid_operations = Problem._unwind(left, equation, index-1, operations)
+            if valid_operations is not None:
+                return valid_operations + [operation]
+        return None
+
+    @staticmethod
+    def _reachable(solution: int, equation: List[int], operations: Operations) -> bool:
+        # Breadth-wise: every reachable intermediate value is kept in one array and expanded per operand
+        if np is None:
+            raise ImportError('The vectorized engine requires numpy')
+        largest = 10 ** len(str(max(equation))) # Above every operand and every concatenation multiplier
+        if 0 in equation[1:] or (solution + 1) * largest > INT64_MAX:
+            # Zero breaks the prune below, and big values would overflow int64 (or run past POWERS_OF_TEN)
+            return Problem._unwind(solution, equation, len(equation)-1, operations) is not None
+        values = np.array([equation[0]], dtype=np.int64)
+        for value in equation[1:]:
+            expanded = []
+            for operation in operations:
+                match operation:
+                    case Operation.ADD: expanded.append(values + value)
+                    case Operation.MUL: expanded.append(values * value)
+                    case Operation.CON: expanded.append(values * POWERS_OF_TEN[len(str(value))] + value)
+            values = np.unique(np.concatenate(expanded))
+            values = values[values <= solution] # No operation shrinks a value, so these are dead
+            if len(values) == 0:
+                return False
+        return bool(values[-1] == solution) # np.unique keeps values sorted
+
+def process_lines(indexed_lines: List[IndexedLine], vectorized: bool, counted: bool, operation_set: Operations) -> List[Tuple[int,'Problem']]:
+    # Worker task, module level so the process pool can pickle it
+    return [(index, Problem(input_line, vectorized, counted, operation_set)) for index, input_line in indexed_lines]
+
+class PrefixTrie():
+    # Equations sharing leading operands share one expansion of their reachable values
+    # Dunder Methods
+    def __init__(self) -> None:
+        self.children: Dict[int,'PrefixTrie'] = {}
+        self.targets: List[Tuple[int,int]] = []  # (Line Index, Solution) for equations ending here
+        self.max_target: int = 0                 # Largest solution anywhere below this node
+        self.zero_below: bool = False            # A later zero operand could shrink values, so no pruning
+        self.lines_below: int = 0                # Equations ending at or below this node
+
+    # Public Methods
+    def insert(self, index: int, solution: int, equation: Equation) -> None:
+        node = self
+        for position, value in enumerate(equation):
+            node = node.children.setdefault(value, PrefixTrie())
+            node.max_target = max(node.max_target, solution)
+            node.zero_below = node.zero_below or 0 in equation[position+1:]
+            node.lines_below += 1
+        node.targets.append((index, solution))
+
+    def valid_lines(self, operation_set: Operations) -> Set[int]:
+        # Line indexes whose solution is reachable
+        valid_lines: Set[int] = set()
+        for value, child in self.children.items():
+            child._expand({value}, operation_set, valid_lines, first=True)
+        return valid_lines
+
+    # Private Methods
+    def _expand(self, values: Set[int], operation_set: Operations, valid_lines: Set[int], first: bool = False) -> None:
+        if self.lines_below == 1 and not self.zero_below:
+            # Nothing left to share, so meet in the middle: unwind the solution back to this node
+            # (like the per-line solver) instead of expanding every value forward
+            index, solution, remaining = self._single_line()
+            if (len(remaining) != 0 or not first) and values & PrefixTrie._unwound(solution, remaining, operation_set):
+                valid_lines.add(index)
+            return
+        for index, solution in self.targets:
+            if not first and solution in values: # A lone operand has no operations to be valid with
+                valid_lines.add(index)
+        for value, child in self.children.items():
+            expanded = {operation.value[1](left, value) for left in values for operation in operation_set}
+            if not child.zero_below:
+                expanded = {result for result in expanded if result <= child.max_target}
+            if len(expanded) != 0:
+                child._expand(expanded, operation_set, valid_lines)
+
+    def _single_line(self) -> Tuple[int,int,Equation]:
+        # (Line Index, Solution, Remaining Operands) of the only equation below this node
+        node, remaining = self, []
+        while len(node.targets) == 0:
+            value, node = next(iter(node.children.items()))
+            remaining.append(value)
+        index, solution = node.targets[0]
+        return index, solution, remaining
+
+    @staticmethod
+    def _unwound(solution: int, remaining: Equation, operation_set: Operations) -> Set[int]:
+        # Every left value that the remaining operands can still turn into the solution
+        values: Set[int] = {solution}
+        for value in reversed(remaining):
+            values = {left for result in values for operation in operation_set if (left := operation.undo(result, value)) is not None}
+        return values
 
 # Main Classes
 class Solver():
     # Properties
     problems: Problems = []
     # Dunder Methods
-    def __init__(self, input_data: InputData) -> None:
+    def __init__(self, input_data: InputData, vectorized: bool = False, counted: bool = False, cache_file: Optional[str] = None, shared_prefixes: bool = False) -> None:
         input_lines = input_data.splitlines()
-        stats: Dict[str,str] = {}
-        stats['Progress'] = f'0/{len(input_lines)}'
-        create_buffer(stats)
-        self.completed_tasks = 0
-        self.lock = Lock()
-        def process_line(input_line: InputLine):
-            problem = Problem(input_line)
-            with self.lock:
-                self.completed_tasks += 1
-                stats['Progress'] = f'{self.completed_tasks}/{len(input_lines)}'
-                show_stats(stats)
-            return problem
-        with ThreadPoolExecutor() as executor:
-            self.problems = list(executor.map(process_line, input_lines))
-        remove_buffer(stats)
+        self.vectorized, self.counted, self.shared_prefixes = vectorized, counted, shared_prefixes
+        self.cache_file = cache_file
+        self.cache: EquationCache = Solver._load_cache(cache_file)
+        self.part_one_problems: Problems = self._solve_lines(input_lines, Operation.P1())
+        # Valid without concatenation means valid with it, so only part one's failures are solved again
+        # Counts differ between the operator sets though, so counted runs redo every line
+        retry = [not problem.is_valid or counted for problem in self.part_one_problems]
+        retried = iter(self._solve_lines([line for line, redo in zip(input_lines, retry) if redo], Operation.P2()))
+        self.problems = [next(retried) if redo else problem for problem, redo in zip(self.part_one_problems, retry)]
     def __str__(self) -> str:
         as_string: str = ""
         for problem in self.problems:
             as_string += f'{problem}' + '\n'
         return as_string
     # Public Methods
+    def solve_part_one(self) -> int:
+        return sum(problem.solution for problem in self.part_one_problems if problem.is_valid)
     def solve(self) -> int:
         valid_problem_solutions: List[int] = []
         for problem in self.problems:
             if problem.is_valid:
                 valid_problem_solutions.append(problem.solution)
         return sum(valid_problem_solutions)
+    def operation_counts(self) -> List[int]:
+        # Valid operation assignments per line, filled in when solved with counted=True
+        return [problem.valid_count for problem in self.problems]
+    def save_cache(self) -> None:
+        if self.cache_file is None:
+            return
+        with open(self.cache_file,'w') as file:
+            json.dump(self.cache, file)
+    # Private Methods
+    def _solve_lines(self, input_lines: List[InputLine], operation_set: Operations) -> Problems:
+        problems: List[Optional[Problem]] = [None for _ in input_lines]
+        unsolved: List[IndexedLine] = []
+        # Validity-only engines leave valid lines with NOF operations, which a plain run must still solve
+        needs_operations = not (self.vectorized or self.shared_prefixes)
+        for index, input_line in enumerate(input_lines):
+            cache_entry = self.cache.get(Problem.cache_key(input_line, operation_set))
+            if cache_entry is not None and needs_operations and cache_entry['valid'] and Operation.NOF.value[0] in cache_entry['operations']:
+                cache_entry = None
+            if cache_entry is not None and (cache_entry['count'] is not None or not self.counted):
+                problems[index] = Problem.from_cache(input_line, operation_set, cache_entry)
+            else:
+                unsolved.append((index, input_line))
+        if len(unsolved) != 0 and self.shared_prefixes and not self.counted:
+            # Like the vectorized engine, this only answers validity
+            prefix_trie = PrefixTrie()
+            for index, input_line in unsolved:
+                list_values: List[int] = Problem._list_values(input_line)
+                prefix_trie.insert(index, list_values[0], list_values[1:])
+            valid_lines: Set[int] = prefix_trie.valid_lines(operation_set)
+            for index, input_line in unsolved:
+                is_valid = index in valid_lines
+                operations = Operation.NOF.value[0] * (len(Problem._list_values(input_line)) - 2)
+                cache_entry: CacheEntry = {'valid': is_valid, 'operations': operations, 'count': None if is_valid else 0}
+                problems[index] = Problem.from_cache(input_line, operation_set, cache_entry)
+                self.cache[Problem.cache_key(input_line, operation_set)] = cache_entry
+        elif len(unsolved) != 0:
+            stats: Dict[str,str] = {}
+            stats['Progress'] = f'0/{len(unsolved)}'
+            create_buffer(stats)
+            self.completed_tasks = 0
+            # Most expensive lines go out first so the last chunks are cheap and finish together
+            by_cost: List[IndexedLine] = sorted(unsolved, key=lambda line: Problem.cost(line[1], operation_set), reverse=True)
+            chunks = [by_cost[i:i+CHUNK_SIZE] for i in range(0, len(by_cost), CHUNK_SIZE)]
+            last_redraw = 0.0
+            with ProcessPoolExecutor() as executor:
+                futures = [executor.submit(process_lines, chunk, self.vectorized, self.counted, operation_set) for chunk in chunks]
+                for future in as_completed(futures):
+                    for index, problem in future.result():
+                        problems[index] = problem
+                        self.cache[Problem.cache_key(input_lines[index], operation_set)] = problem.cache_entry()
+                        self.completed_tasks += 1
+                    if time.monotonic() - last_redraw >= REDRAW_DELAY:
+                        last_redraw = time.monotonic()
+                        stats['Progress'] = f'{self.completed_tasks}/{len(unsolved)}'
+                        show_stats(stats)
+            remove_buffer(stats)
+        return [problem for problem in problems if problem is not None]
+    @staticmethod
+    def _load_cache(cache_file: Optional[str]) -> EquationCache:
+        if cache_file is None or not os.path.exists(cache_file):
+            return {}
+        with open(cache_file,'r') as file:
+            return json.load(file)
 
 # Execution
 if __name__ == "__main__":
@@ -182,7 +419,9 @@ if __name__ == "__main__":
     print(input_data,end='\n\n')
 
     print("Initialize Solver...",end='\n\n\n')
-    solver = Solver(input_data)
+    solver = Solver(input_data, cache_file=CACHE_FILE)
     print(solver,end='\n')
+    solver.save_cache()
 
-    print(f"Answer: {solver.solve()}")
+    print(f"Part One Answer: {solver.solve_part_one()}")
+    print(f"Part Two Answer: {solver.solve()}")
@@ -1,18 +1,19 @@
 # Imports
-from copy import deepcopy
-from itertools import product
-from dataclasses import dataclass
-from collections import defaultdict
-from typing import TypeAlias, List, Tuple, Dict, Set, Any
+from math import gcd
+from itertools import combinations
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import TypeAlias, List, Tuple, Dict, Set, Optional
 
 # Types
 RawInput          : TypeAlias = str
 Position          : TypeAlias = Tuple[int,int]
-NodeMatrix        : TypeAlias = List[List['Node']]
-Frequencies       : TypeAlias = Dict[str,List['Node']]
+Frequencies       : TypeAlias = Dict[str,List[Position]] # Frequency -> antenna positions
+Antinodes         : TypeAlias = Set[int]                 # Positions flattened to row*cols + col
+AntinodeCounts    : TypeAlias = Counter[int]             # Antinode -> how many antenna pairs produce it
+Bitmap            : TypeAlias = bytearray                # One bit per flattened position
 ProgressStatistics: TypeAlias = Dict[str,str]
 
-
 # Exceptions
 # Decided against Custom Exceptions
 # AoC styled Questions don't need Error Handling
@@ -43,200 +44,152 @@ def get_input(use_official_data: bool = False) -> RawInput:
             input_data = file.read().strip('\n')
     return input_data
 
-def rows_cols(matrix: List[List[Any]]) -> Tuple[int,int]:
-    """Gets the rows and cols of a matrix"""
-    # I could cache this, but it's not an intesive function
-    # And I'd have to have a hashable input, that'd decrease readability
-    return len(matrix),len(matrix[0])
-
-def in_bounds(position: Position, matrix: List[List[Any]]) -> bool:
-    """Checks if position is in the bounds of a matrix"""
+def in_bounds(position: Position, rows: int, cols: int) -> bool:
+    """Checks if position is in the bounds of the grid"""
     row , col  = position[0],position[1]
-    rows, cols = rows_cols(matrix)
     return (0 <= row < rows) and (0 <= col < cols)
 
-# Helper Classes
-@dataclass
-class Node:
-    """Define core data structures needed for the problem"""
-    # Properties
-    value: str
-    position: Position
-    nodes: List['Node']
-    owned_antinodes: Dict[Position,str]
-    active_antinodes: Set[str]
-
-    '''
-    #......     Node-x-1            Node-x-2        Node-0,0      Node-6,6
-    .......      - x                 - x             - .           - .
-    ..x....      - (2,2)             - (4,4)         - (0,0)       - (6,6)
-    .......      - [<nx2>]           - [<nx1>]       - None        - None
-    ....x..      - {(0,0), x}        - {(6,6), x}    - {}          - {}
-    .......      - []                - []            - [x]         - [x]
-    ......#     antinode.pos = ???
-    '''
-
-    '''
-    ......#     Node-x-1            Node-x-2        Node-0,6      Node-6,0
-    .......      - x                 - x             - .           - .
-    ....x..      - (2,4)             - (4,2)         - (0,6)       - (6,0)
-    .......      - [<nx2>]           - [<nx1>]       - None        - None
-    ..x....      - {(0,6), x}        - {(6,0), x}    - {}          - {}
-    .......      - []                - []            - [x]         - [x]
-    #......     antinode.pos = ???
-    '''
-
-    # Dunder Methods
-    def __init__(self, value: str) -> None:
-       self.value = value
-       self.owned_antinodes = {}
-       self.active_antinodes = set()
-
-    def __str__(self) -> str:
-        as_string = f'{self.value}'
-        if as_string == '.' and len(self.active_antinodes) != 0: as_string = '#'
-        return as_string
-
-    # Public Methods
-    def process(self) -> None:
-        """Set Antinodes for Nodes of same frequency"""
-        for node in self.nodes:
-            x = Node._offset(self.position[0],node.position[0])
-            y = Node._offset(self.position[1],node.position[1])
-            self.owned_antinodes[(x,y)] = self.value
-
-    def boost_process(self, matrix: List[List[Any]]) -> None:
-        """Set Repeating Antinodes for Nodes of same frequency"""
-        for node in self.nodes:
-            a = node.position[0]                    # 2
-            b = node.position[1]                    # 2
-            x = Node._offset(self.position[0],a)    # 2+(2-0)=4
-            y = Node._offset(self.position[1],b)    # 2+(2-0)=4
-            while in_bounds((x,y),matrix):
-                self.owned_antinodes[(x,y)] = self.value
-                c,d = x,y                           # 4,4        6,6
-                x = Node._offset(a,x)               # 4+(4-2)=6  6+(6-4)=8
-                y = Node._offset(b,y)               # 4+(4-2)=6  6+(6-4)=8
-                a,b = c,d                           # 4,4        6,6
-
-    # Private Methods
-    @staticmethod
-    def _offset(a: int, b: int) -> int:
-        """Calculates offset between two points"""
-        return b + (b - a)
+def offset(a: int, b: int) -> int:
+    """Calculates offset between two points"""
+    return b + (b - a)
+
+def pair_antinodes(a: Position, b: Position, rows: int, cols: int) -> List[int]:
+    """Antinodes for Solution 1, one beyond either end of the pair"""
+    antinodes: List[int] = []
+    for x, y in ((offset(a[0],b[0]), offset(a[1],b[1])), (offset(b[0],a[0]), offset(b[1],a[1]))):
+        if in_bounds((x,y), rows, cols):
+            antinodes.append(x * cols + y)
+    return antinodes
+
+def pair_harmonics(a: Position, b: Position, rows: int, cols: int) -> List[int]:
+    """Repeating Antinodes for Solution 2, every grid point on the pair's line"""
+    antinodes: List[int] = []
+    # Stepping by the reduced offset hits every grid point on the line, not just every other one
+    d_row, d_col = b[0] - a[0], b[1] - a[1]
+    divisor = gcd(d_row, d_col)
+    d_row, d_col = d_row // divisor, d_col // divisor
+    for step_row, step_col, x, y in ((d_row, d_col, a[0], a[1]), (-d_row, -d_col, a[0] - d_row, a[1] - d_col)):
+        while in_bounds((x,y), rows, cols):
+            antinodes.append(x * cols + y)
+            x, y = x + step_row, y + step_col
+    return antinodes
+
+def frequency_bitmaps(positions: List[Position], rows: int, cols: int) -> Tuple[bytes,bytes]:
+    """Worker task, one frequency group's antinodes for both parts as bitmaps"""
+    bitmaps: Tuple[Bitmap,Bitmap] = bytearray((rows * cols + 7) // 8), bytearray((rows * cols + 7) // 8)
+    for a, b in combinations(positions, 2):
+        for bitmap, antinodes in zip(bitmaps, (pair_antinodes(a, b, rows, cols), pair_harmonics(a, b, rows, cols))):
+            for antinode in antinodes:
+                bitmap[antinode >> 3] |= 1 << (antinode & 7)
+    return bytes(bitmaps[0]), bytes(bitmaps[1])
 
 # Main Class
 class Solver:
     # Dunder Methods
     def __init__(self, raw_input: RawInput) -> None:
         """Initialize solver with input data"""
-        self.node_matrix = self._process_input(raw_input)
+        self._load(*self._process_input(raw_input))
 
     def __str__(self) -> str:
         """String representation of current state"""
-        as_string = ""
-        rows, cols = rows_cols(self.node_matrix)
-        for row,col in product(range(rows),range(cols)):
-            as_string += f'{self.node_matrix[row][col]}' + ('\n' if col+1 == cols else '')
-        return as_string
+        grid = [['#' if row * self.cols + col in self.antinodes else '.' for col in range(self.cols)] for row in range(self.rows)]
+        for frequency, positions in self.frequencies.items():
+            for row, col in positions:
+                grid[row][col] = frequency
+        return ''.join(''.join(line) + '\n' for line in grid)
 
     # Public Methods
+    @staticmethod
+    def from_antennas(frequencies: Frequencies, rows: int, cols: int) -> 'Solver':
+        """Sparse mode: only antenna coordinates and grid size, e.g. a 10^7 x 10^7 grid"""
+        # Memory follows the antinodes found, nothing is allocated per grid cell
+        solver: Solver = Solver.__new__(Solver)
+        solver._load(rows, cols, frequencies, sparse=True)
+        return solver
+
     def solve_part_one(self) -> int:
         """Solve part one of the problem"""
-        node_matrix: NodeMatrix = deepcopy(self.node_matrix)
-        self.node_matrix = Solver._activate_nodes(self.node_matrix)
-        result = 0
-        rows, cols = rows_cols(self.node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            result += 1 if len(self.node_matrix[row][col].active_antinodes) != 0 else 0
-        print(self,end='')
-        self.node_matrix = node_matrix
-        return result
+        self.antinodes = set(self.antinode_counts)
+        if not self.sparse: # Drawing a sparse grid would cost rows*cols
+            print(self,end='')
+        return len(self.antinodes)
 
     def solve_part_two(self) -> int:
         """Solve part two of the problem"""
-        node_matrix: NodeMatrix = deepcopy(self.node_matrix)
-        self.node_matrix = Solver._activate_boosted_nodes(self.node_matrix)
-        result = 0
-        rows, cols = rows_cols(self.node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            result += 1 if len(self.node_matrix[row][col].active_antinodes) != 0 else 0
-            if len(self.node_matrix[row][col].active_antinodes) == 0 and self.node_matrix[row][col].value != '.':
-                result += 1
-        print(self,end='')
-        self.node_matrix = node_matrix
-        return result
+        self.antinodes = set(self.harmonic_counts)
+        if not self.sparse: # Drawing a sparse grid would cost rows*cols
+            print(self,end='')
+        return len(self.antinodes)
+
+    def counts(self) -> Tuple[int,int]:
+        """Current part one and part two counts, without redrawing"""
+        return len(self.antinode_counts), len(self.harmonic_counts)
+
+    def parallel_counts(self, max_workers: Optional[int] = None) -> Tuple[int,int]:
+        """Part one and part two counts from scratch, one frequency group per worker task"""
+        # Bitmaps cover rows*cols, so sparse grids from from_antennas answer with counts() instead
+        if self.sparse:
+            return self.counts()
+        # Groups are independent, so the bitmaps are simply OR-ed together and popcounted
+        part_one, part_two = 0, 0
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(frequency_bitmaps, positions, self.rows, self.cols) for positions in self.frequencies.values()]
+            for future in futures:
+                bitmap_one, bitmap_two = future.result()
+                part_one |= int.from_bytes(bitmap_one, 'little')
+                part_two |= int.from_bytes(bitmap_two, 'little')
+        return part_one.bit_count(), part_two.bit_count()
+
+    def add_antenna(self, frequency: str, position: Position) -> None:
+        """Place an antenna, only its pairs with the same frequency are evaluated"""
+        if position in self.antenna_frequencies:
+            self.remove_antenna(position)
+        for other in self.frequencies[frequency]:
+            self._count_pair(position, other, 1)
+        self.frequencies[frequency].append(position)
+        self.antenna_frequencies[position] = frequency
+
+    def remove_antenna(self, position: Position) -> None:
+        """Take an antenna away, releasing only the antinodes its pairs produced"""
+        frequency = self.antenna_frequencies.pop(position)
+        self.frequencies[frequency].remove(position)
+        if len(self.frequencies[frequency]) == 0:
+            del self.frequencies[frequency]
+        for other in self.frequencies.get(frequency, []):
+            self._count_pair(position, other, -1)
 
     # Private Methods
-    @staticmethod
-    def _inactive_node_matrix(raw_input: RawInput) -> NodeMatrix:
-        """Get a Node Matrix with only values being set"""
-        return [[Node(value) for value in line] for line in raw_input.splitlines()]
+    def _load(self, rows: int, cols: int, frequencies: Frequencies, sparse: bool = False) -> None:
+        """Set up the antenna index and antinode counts"""
+        self.rows, self.cols = rows, cols
+        self.sparse: bool = sparse
+        self.antinodes: Antinodes = set()
+        self.frequencies: Frequencies = defaultdict(list)
+        self.antenna_frequencies: Dict[Position,str] = {}
+        self.antinode_counts: AntinodeCounts = Counter()
+        self.harmonic_counts: AntinodeCounts = Counter()
+        for frequency, positions in frequencies.items():
+            for position in positions:
+                self.add_antenna(frequency, position)
+
+    def _count_pair(self, a: Position, b: Position, change: int) -> None:
+        """Add (1) or release (-1) one antenna pair's antinodes for both parts"""
+        for counts, antinodes in ((self.antinode_counts, pair_antinodes(a, b, self.rows, self.cols)), (self.harmonic_counts, pair_harmonics(a, b, self.rows, self.cols))):
+            for antinode in antinodes:
+                counts[antinode] += change
+                if counts[antinode] == 0:
+                    del counts[antinode]
 
     @staticmethod
-    def _frequencies(node_matrix: NodeMatrix) -> Frequencies:
-        """Get frequency list in Node Matrix"""
+    def _process_input(raw_input: RawInput) -> Tuple[int,int,Frequencies]:
+        """Index antenna positions by frequency, the empty cells are never stored"""
+        lines = raw_input.splitlines()
         frequencies: Frequencies = defaultdict(list)
-        rows, cols = rows_cols(node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            if node_matrix[row][col].value != '.':
-                frequencies[node_matrix[row][col].value].append(node_matrix[row][col])
-        return frequencies
-
-    @staticmethod
-    def _place_nodes(node_matrix: NodeMatrix) -> NodeMatrix:
-        """Set the positions of each node in matrix"""
-        rows, cols = rows_cols(node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            node_matrix[row][col].position = row, col
-        return node_matrix
-
-    @staticmethod
-    def _connect_nodes(node_matrix: NodeMatrix, frequencies: Frequencies) -> NodeMatrix:
-        """Connect each node by frequency"""
-        rows, cols = rows_cols(node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            if node_matrix[row][col].value != '.':
-                node: Node = node_matrix[row][col]
-                # We dont want to add a node to its own list of nodes
-                node.nodes = [n for n in frequencies[node.value] if node.position != n.position]
-                node_matrix[row][col] = node
-        return node_matrix
-
-    @staticmethod
-    def _activate_nodes(node_matrix: NodeMatrix) -> NodeMatrix:
-        """Set Antinodes for Solution 1"""
-        rows, cols = rows_cols(node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            if node_matrix[row][col].value != '.':
-                node_matrix[row][col].process()
-                for antinode in node_matrix[row][col].owned_antinodes.items():
-                    (x,y), value = antinode
-                    if in_bounds((x,y), node_matrix):
-                        node_matrix[x][y].active_antinodes.add(value)
-        return node_matrix
-
-    @staticmethod
-    def _activate_boosted_nodes(node_matrix: NodeMatrix) -> NodeMatrix:
-        """Set Antinodes for Solution 2"""
-        rows, cols = rows_cols(node_matrix)
-        for row, col in product(range(rows),range(cols)):
-            if node_matrix[row][col].value != '.':
-                node_matrix[row][col].boost_process(node_matrix)
-                for antinode in node_matrix[row][col].owned_antinodes.items():
-                    (x,y), value = antinode
-                    if in_bounds((x,y), node_matrix):
-                        node_matrix[x][y].active_antinodes.add(value)
-        return node_matrix
-
-    @staticmethod
-    def _process_input(raw_input: RawInput) -> NodeMatrix:
-        """Pipeline for converting raw input into a node matrix"""
-        node_matrix: NodeMatrix = Solver._inactive_node_matrix(raw_input)
-        node_matrix = Solver._place_nodes(node_matrix)
-        frequencies: Frequencies = Solver._frequencies(node_matrix)
-        node_matrix = Solver._connect_nodes(node_matrix, frequencies)
-        return node_matrix
+        for row, line in enumerate(lines):
+            for col, value in enumerate(line):
+                if value != '.':
+                    frequencies[value].append((row, col))
+        return len(lines), len(lines[0]), frequencies
 
 # Execute
 if __name__ == "__main__":
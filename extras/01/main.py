@@ -1,5 +1,10 @@
 from random import randint
-from typing import List, Tuple, TypeAlias
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Tuple, TypeAlias
+try:
+    import numpy as np # Only needed for batch decoding
+except ImportError:
+    np = None
 
 '''
 We'll be getting a Raw String
@@ -17,6 +22,8 @@ Transmission         : TypeAlias = Tuple[
     EncodedTransmission,
     TransmissionDecoder
 ]
+SparseTable          : TypeAlias = List[List[int]]
+RangeTable           : TypeAlias = Tuple[SparseTable,SparseTable] # (Min Table, Max Table)
 
 # Constants
 TRANSMISSION_FILE: str = 'input.txt'
@@ -73,12 +80,19 @@ def parse_raw_transmissions(raw_transmissions: List[RawTransmission]) -> List[Tr
     '''Take in a list of raw transmissions and parse them into useable data'''
     transmissions: List[Transmission] = []
     for raw_transmission in raw_transmissions:
-        encoded_transmission_raw, transmission_decoder_raw = raw_transmission.split(" | ")
-        encoded_transmission = [int(number) for number in encoded_transmission_raw.split(",")]
-        transmission_decoder = [int(number) for number in transmission_decoder_raw.split(",")]
-        transmissions.append((encoded_transmission,transmission_decoder))
+        transmissions.append(parse_raw_transmission(raw_transmission))
     return transmissions
 
+def parse_raw_transmission(raw_transmission: RawTransmission) -> Transmission:
+    '''
+    Parse a single raw transmission
+    "1,2,3,4,5,6,7 | 1,2,3" ==> ([1,2,3,4,5,6,7],[1,2,3])
+    '''
+    encoded_transmission_raw, transmission_decoder_raw = raw_transmission.split(" | ")
+    encoded_transmission = [int(number) for number in encoded_transmission_raw.split(",")]
+    transmission_decoder = [int(number) for number in transmission_decoder_raw.split(",")]
+    return encoded_transmission,transmission_decoder
+
 # Step 3 - Apply the Decoder
 def decode_transmission(transmission: Transmission) -> int:
     '''
@@ -94,6 +108,108 @@ def decode_transmission(transmission: Transmission) -> int:
         transmission_value += max(chunk) - min(chunk)
     return transmission_value
 
+# Step 3b - Apply the Decoders in Bulk
+def decode_transmissions(transmissions: List[Transmission]) -> List[int]:
+    '''
+    Same result as decode_transmission for every transmission, in a few vector passes.
+    Assumes every decoder fits its transmission, as generate_transmission_decoder ensures.
+
+    Every transmission is packed into one flat array and every chunk becomes a start offset:
+    [8,2,5,8,7,7,2 | 3,3] [9,6,9,1,4,4,4 | 3] ==> flat [8,2,5,8,7,7,2,9,6,9,1,4,4,4]
+    chunk starts [0,3,7]   tail boundaries [6,10]   (tails mark where a decoder stops)
+    '''
+    if np is None:
+        raise ImportError('decode_transmissions requires numpy')
+    encoded_lengths = np.array([len(encoded) for encoded, _ in transmissions], dtype=np.int64)
+    decoder_lengths = np.array([len(decoder) for _, decoder in transmissions], dtype=np.int64)
+    # The trailing 0 keeps a tail boundary at the very end of the array in range
+    flat = np.array([value for encoded, _ in transmissions for value in encoded] + [0], dtype=np.int64)
+    chunk_sizes = np.array([size for _, decoder in transmissions for size in decoder], dtype=np.int64)
+    chunk_owner = np.repeat(np.arange(len(transmissions)), decoder_lengths)
+
+    encoded_starts = np.cumsum(encoded_lengths) - encoded_lengths
+    decoded_lengths = np.zeros(len(transmissions), dtype=np.int64)
+    np.add.at(decoded_lengths, chunk_owner, chunk_sizes)
+    # Offset of each chunk inside its own transmission, from one cumulative sum over all chunks
+    all_offsets = np.cumsum(chunk_sizes) - chunk_sizes
+    chunk_starts = encoded_starts[chunk_owner] + all_offsets - (np.cumsum(decoded_lengths) - decoded_lengths)[chunk_owner]
+    tail_starts = encoded_starts + decoded_lengths
+
+    # Sorted by position, tails before chunks on ties so every chunk range stops at the right place
+    starts = np.concatenate([chunk_starts, tail_starts])
+    is_chunk = np.concatenate([np.ones(len(chunk_starts), dtype=bool), np.zeros(len(tail_starts), dtype=bool)])
+    order = np.lexsort((is_chunk, starts))
+    ranges = np.maximum.reduceat(flat, starts[order]) - np.minimum.reduceat(flat, starts[order])
+    # Chunk starts only ever increase, so the chunks come out of the sort in their original order
+    chunk_ranges = ranges[is_chunk[order]]
+
+    transmission_values = np.zeros(len(transmissions), dtype=np.int64)
+    np.add.at(transmission_values, chunk_owner, chunk_ranges)
+    return transmission_values.tolist()
+
+# Step 3c - Decode One Transmission Many Times
+def build_range_table(encoded_transmission: EncodedTransmission) -> RangeTable:
+    '''
+    Sparse tables for range min/max, built once per encoded transmission.
+    table[k][i] covers the 2^k values starting at i
+    [8,2,5,8] ==> max table [[8,2,5,8],[8,5,8],[8]]
+    '''
+    min_table: SparseTable = [list(encoded_transmission)]
+    max_table: SparseTable = [list(encoded_transmission)]
+    width = 1
+    while width * 2 <= len(encoded_transmission):
+        previous_min, previous_max = min_table[-1], max_table[-1]
+        min_table.append([min(previous_min[i], previous_min[i+width]) for i in range(len(previous_min) - width)])
+        max_table.append([max(previous_max[i], previous_max[i+width]) for i in range(len(previous_max) - width)])
+        width *= 2
+    return min_table, max_table
+
+def decode_with_range_table(range_table: RangeTable, transmission_decoder: TransmissionDecoder) -> int:
+    '''
+    Same result as decode_transmission, but each chunk is two overlapping table lookups
+    so a decoder costs O(number of chunks) no matter how long the chunks are.
+    '''
+    min_table, max_table = range_table
+    transmission_length = len(min_table[0])
+    transmission_index = 0
+    transmission_value = 0
+    for chunk_size in transmission_decoder:
+        # Chunks running past the end are cut short, like slicing the list
+        start, end = transmission_index, min(transmission_index + chunk_size, transmission_length)
+        transmission_index += chunk_size
+        level = (end - start).bit_length() - 1
+        chunk_max = max(max_table[level][start], max_table[level][end - (1 << level)])
+        chunk_min = min(min_table[level][start], min_table[level][end - (1 << level)])
+        transmission_value += chunk_max - chunk_min
+    return transmission_value
+
+# Step 4 - Stream Large Transmission Files
+'''
+The same pipeline as generators: read -> parse -> decode -> aggregate.
+Only one line is held at a time, so memory stays constant whatever the file size.
+'''
+def stream_raw_transmissions(file_name: str = TRANSMISSION_FILE) -> Iterator[RawTransmission]:
+    '''Yield the file's transmissions one buffered line at a time, skipping empty lines'''
+    with open(file_name,'r') as file:
+        for line in file:
+            raw_transmission = line.rstrip('\n')
+            if raw_transmission != '':
+                yield raw_transmission
+
+def stream_transmissions(raw_transmissions: Iterable[RawTransmission]) -> Iterator[Transmission]:
+    '''Lazily parse raw transmissions'''
+    for raw_transmission in raw_transmissions:
+        yield parse_raw_transmission(raw_transmission)
+
+def stream_transmission_values(transmissions: Iterable[Transmission]) -> Iterator[int]:
+    '''Lazily decode transmissions'''
+    for transmission in transmissions:
+        yield decode_transmission(transmission)
+
+def stream_running_totals(file_name: str = TRANSMISSION_FILE) -> Iterator[int]:
+    '''Running total of the decoded values, one per transmission in the file'''
+    return accumulate(stream_transmission_values(stream_transmissions(stream_raw_transmissions(file_name))))
+
 
 if __name__ == "__main__":
     # Make/Display New Test Data
@@ -117,3 +233,9 @@ if __name__ == "__main__":
     print("Successfully Decoded!")
     for index, value in enumerate(transmission_values):
         print(f'Transmission {index+1}: {value}')
+
+    # Stream the Same File
+    running_total = 0
+    for running_total in stream_running_totals():
+        pass
+    print(f'Streamed Total: {running_total}')